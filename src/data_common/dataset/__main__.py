@@ -232,7 +232,12 @@ def create(slug: str = "", all: bool = False):
 @cli.command()
 @slug_command
 @all_command
-def validate(slug: str = "", all: bool = False):
+@click.option(
+    "--check-build",
+    is_flag=True,
+    help="Also run the full validator against the built package",
+)
+def validate(slug: str = "", all: bool = False, check_build: bool = False):
     """
     Validate a datapackage against their schema
     """
@@ -240,7 +245,7 @@ def validate(slug: str = "", all: bool = False):
     packages = get_relevant_packages(slug, all)
     for p in packages:
         rich.print(f"[blue]Validating: {p.slug}[/blue]")
-        errors = p.validate(quiet=False)
+        errors = p.validate(quiet=False, check_build=check_build)
         error_count += len(errors)
         for error, color in errors:
             rich.print(f"[{color}]{error}[/{color}]")
@@ -256,7 +261,12 @@ def validate(slug: str = "", all: bool = False):
 @cli.command()
 @slug_command
 @all_command
-def build(slug: str = "", all: bool = False):
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Also rebuild the package files, even if they are up to date",
+)
+def build(slug: str = "", all: bool = False, force: bool = False):
     """
     Build a packing using a defined function
     """
@@ -265,12 +275,15 @@ def build(slug: str = "", all: bool = False):
         rich.print(f"[blue]Building: {p.slug}[/blue]")
         p.build_from_function()
         p.rebuild_all_resources()
+        if force:
+            p.build_package(force=True)
 
 
 @cli.command()
 @slug_command
 @all_command
-def publish(slug: str = "", all: bool = False):
+@click.option("--force", is_flag=True, help="Rebuild files even if they are up to date")
+def publish(slug: str = "", all: bool = False, force: bool = False):
     """
     Render any missing versions and move them to the jekyll data directory.
     """
@@ -278,7 +291,7 @@ def publish(slug: str = "", all: bool = False):
     packages = get_relevant_packages(slug, all)
     for p in packages:
         p.rebuild_all_resources()
-        p.build_package()
+        p.build_package(force=force)
         p.build_missing_previous_versions()
     rich.print("Building Jekyll markdown files")
     render_jekyll()
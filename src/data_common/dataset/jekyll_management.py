@@ -1,17 +1,63 @@
+import io
 import json
+import os
+import re
 import shutil
+import sys
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
-import pandas as pd
-from ruamel.yaml import YAML
+import yaml
 
 from .settings import get_settings
 from .version_management import map_versions_to_latest_major_minor
 
+try:
+    import fcntl
+except ImportError:  # windows
+    fcntl = None
+
+try:
+    from yaml import CSafeDumper as _Dumper
+except ImportError:
+    from yaml import SafeDumper as _Dumper
+
+# datapackage.json contents already parsed during this render,
+# keyed by path - shared between fill_in_versions and collect_jekyll_data
+_parsed_datapackages: dict[str, dict[str, Any]] = {}
+
+# folder names of full (major.minor.patch) published versions
+_FULL_VERSION_RE = re.compile(r"^\d+\.\d+\.\d+$")
+
+# destination and frontmatter for a rendered markdown file
+Page = tuple[str, dict[str, Any]]
+
+# list of the pages the last render wrote into each output folder, so only
+# those are ever pruned (Jekyll skips dotfiles)
+_MANIFEST_NAME = ".rendered_pages"
+
+# shared dump settings for all frontmatter - wide lines so long
+# descriptions are not re-wrapped
+_dump_yaml = partial(
+    yaml.dump,
+    Dumper=_Dumper,
+    default_flow_style=False,
+    sort_keys=False,
+    allow_unicode=True,
+    width=4096,
+)
+
 
 def markdown_with_frontmatter(
-    data: dict[str, Any], dest: Path, content: str = "", from_file: Path | None = None
+    data: dict[str, Any],
+    dest: Path | str,
+    content: str = "",
+    from_file: Path | None = None,
 ):
     if content and from_file:
         raise ValueError("Trying to use contents and from_file arguments")
@@ -19,62 +65,225 @@ def markdown_with_frontmatter(
     if from_file:
         content = from_file.read_text()
 
-    yaml = YAML()
-    yaml.default_flow_style = False
-
-    with open(dest, "w") as f:
-        f.write("---\n")
-        yaml.dump(data, f)
-        f.write("---\n")
-        if content:
-            f.write(content)
-
-
-def render_download_format_to_dir(items: list[dict[str, Any]], output_dir: Path):
-    if output_dir.exists() is False:
-        output_dir.mkdir()
-    # remove existing files
-    for e in output_dir.glob("*/*.md"):
-        e.unlink()
-
-    for dataset in items:
-        for data_format in dataset["custom"].get(
-            "formats", {"csv": True, "parquet": True}
-        ):
-            resources = collect_jekyll_data_for_package(dataset, data_format)
-            for r in resources:
-                datapackage_path = output_dir / f"{r['name']}"
-                if datapackage_path.exists() is False:
-                    datapackage_path.mkdir()
-                markdown_file = datapackage_path / f"{dataset['version']}.md"
-                markdown_with_frontmatter(r, markdown_file)
-
-
-def render_sources_to_dir(items: list[dict[str, Any]], output_dir: Path):
-    if output_dir.exists() is False:
-        output_dir.mkdir()
-    # remove existing files
-    for e in output_dir.glob("*/*.md"):
-        e.unlink()
-
-    for dataset in items:
-        datapackage_path = output_dir / f"{dataset['name']}"
-        if datapackage_path.exists() is False:
-            datapackage_path.mkdir()
-        markdown_file = datapackage_path / f"{dataset['version']}.md"
-        markdown_with_frontmatter(dataset, markdown_file)
+    # build the whole file in memory and write it in one go
+    buffer = io.StringIO()
+    buffer.write("---\n")
+    _dump_yaml(data, buffer)
+    buffer.write("---\n")
+    if content:
+        buffer.write(content)
+
+    new_contents = buffer.getvalue().encode("utf-8")
+
+    # leave unchanged files alone so Jekyll's incremental build can skip them
+    try:
+        with open(dest, "rb") as f:
+            if f.read() == new_contents:
+                return
+    except FileNotFoundError:
+        pass
+
+    with open(dest, "wb") as f:
+        f.write(new_contents)
+
+
+def _write_markdown_files(pages: list[Page]):
+    """
+    Write a batch of (destination, frontmatter) markdown files in parallel.
+    Any folders needed should already exist.
+    """
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    futures: list[Future] = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for dest, data in pages:
+            futures.append(executor.submit(markdown_with_frontmatter, data, dest))
+    for future in futures:
+        future.result()
+
+
+def _remove_stale_files(output_dir: Path, rendered: set[str]):
+    """
+    Remove pages the previous render wrote into output_dir that the current
+    render did not produce (rendered, relative to output_dir), and any
+    folders that leaves empty. Files the renderer didn't write are left alone.
+    """
+    manifest = output_dir / _MANIFEST_NAME
+    try:
+        previous = manifest.read_text().splitlines()
+    except FileNotFoundError:
+        previous = []
+    emptied: set[Path] = set()
+    for name in previous:
+        if name not in rendered:
+            path = output_dir / name
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            emptied.add(path.parent)
+    for folder in emptied:
+        if folder != output_dir and not any(folder.iterdir()):
+            folder.rmdir()
+    manifest.write_text("".join(f"{name}\n" for name in sorted(rendered)))
+
+
+def _render_pages(pages: list[Page], output_dirs: list[Path]):
+    """
+    Write the pages, then clear out pages left over from previous renders
+    """
+    _write_markdown_files(pages)
+    for output_dir in output_dirs:
+        prefix = f"{output_dir}/"
+        rendered = {
+            dest.removeprefix(prefix) for dest, _ in pages if dest.startswith(prefix)
+        }
+        _remove_stale_files(output_dir, rendered)
+
+
+def _source_page(package: dict[str, Any], output_dir: Path) -> Page:
+    """
+    Page describing a single version of a datapackage
+    """
+    datapackage_path = f"{output_dir}/{package['name']}"
+    os.makedirs(datapackage_path, exist_ok=True)
+    return f"{datapackage_path}/{package['version']}.md", package
+
+
+def _download_pages(package: dict[str, Any], output_dir: Path) -> list[Page]:
+    """
+    Pages for each download of a single version of a datapackage
+    """
+    # keyed by destination - the xlsx/json/sqlite records are produced
+    # for every format, but only need rendering once
+    pages: dict[str, dict[str, Any]] = {}
+    base = str(output_dir)
+    version = package["version"]
+    formats = package["custom"].get("formats", {"csv": True, "parquet": True})
+    for data_format in formats:
+        for r in collect_jekyll_data_for_package(package, data_format):
+            datapackage_path = f"{base}/{r['name']}"
+            dest = f"{datapackage_path}/{version}.md"
+            if dest not in pages:
+                os.makedirs(datapackage_path, exist_ok=True)
+                pages[dest] = r
+    return list(pages.items())
+
+
+def _version_page(
+    name: str, title: str, versions: list[tuple[str, str]], output_dir: Path
+) -> Page:
+    """
+    Page listing the (full version, version label) pairs for a datapackage
+    """
+    safe_name = str(name).replace("-", "_")
+    versions.sort()
+    data_dict = {
+        "name": name,
+        "title": title,
+        "versions": {
+            full: [label for _, label in group]
+            for full, group in groupby(versions, key=itemgetter(0))
+        },
+        "permalink": f"/datasets/{safe_name}/versions",
+    }
+    return f"{output_dir}/{safe_name}.md", data_dict
+
+
+def render_all(items: list[dict[str, Any]], publish_dir: Path):
+    """
+    Render the dataset, version list and download pages for all
+    datapackages in a single pass over the items
+    """
+    datasets_dir = publish_dir / "_datasets"
+    versionlists_dir = publish_dir / "_versionlists"
+    downloads_dir = publish_dir / "_downloads"
+    output_dirs = [datasets_dir, versionlists_dir, downloads_dir]
+    for output_dir in output_dirs:
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    pages: list[Page] = []
+    titles: dict[str, str] = {}
+    versions_by_name: defaultdict[str, list[tuple[str, str]]] = defaultdict(list)
+    for package in items:
+        pages.append(_source_page(package, datasets_dir))
+        pages.extend(_download_pages(package, downloads_dir))
+        titles.setdefault(package["name"], package["title"])
+        versions_by_name[package["name"]].append(
+            (str(package["full_version"]), str(package["version"]))
+        )
+
+    for name, versions in versions_by_name.items():
+        pages.append(_version_page(name, titles[name], versions, versionlists_dir))
+
+    _render_pages(pages, output_dirs)
+
+
+def _find_datapackages(data_dir: Path) -> Iterator[tuple[str, str, str]]:
+    """
+    Find published datapackages at data_dir/<package>/<version>/datapackage.json
+    Yields (package folder, version name, datapackage.json path) as strings.
+    """
+    with os.scandir(data_dir) as packages:
+        for package in packages:
+            if not package.is_dir():
+                continue
+            with os.scandir(package.path) as versions:
+                for version in versions:
+                    if not version.is_dir():
+                        continue
+                    datapackage = os.path.join(version.path, "datapackage.json")
+                    if os.path.isfile(datapackage):
+                        yield package.path, version.name, datapackage
+
+
+# linux ioctl that shares a file's blocks copy-on-write (btrfs, xfs)
+_FICLONE = 0x40049409
+
+
+def clone_file(src: Path, dst: Path):
+    """
+    Copy a file, sharing the data blocks with the original where the
+    filesystem supports it, so large resources aren't duplicated on disk.
+    Not a hardlink, as package files are rewritten in place.
+    """
+    if fcntl is not None and sys.platform == "linux":
+        try:
+            with open(src, "rb") as s, open(dst, "wb") as d:
+                fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+            shutil.copymode(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy(src, dst)
+
+
+def _load_datapackage(datapackage_path: str) -> dict[str, Any]:
+    """
+    Load a published datapackage.json, reusing an earlier parse if there is one
+    """
+    if (data := _parsed_datapackages.get(datapackage_path)) is None:
+        with open(datapackage_path) as f:
+            data = json.load(f)
+        _parsed_datapackages[datapackage_path] = data
+    return data
 
 
 def fill_in_versions():
     """
     Copy the latest version of each dataset to the latest major/minor version
+    (sharing storage with clone_file where possible)
     """
     data_dir = get_settings()["publish_dir"] / "data"
 
-    datapackages = data_dir.glob("*/*/datapackage.json")
-    datapackages = list(set([x.parent.parent for x in datapackages]))
-    for package_folder in datapackages:
-        full_versions = [str(x).split("/")[-1] for x in package_folder.glob(("*.*.*/"))]
+    # de-duplicate package folders, keeping discovery order
+    package_folders = dict.fromkeys(
+        package for package, _, _ in _find_datapackages(data_dir)
+    )
+    for package_folder in map(Path, package_folders):
+        with os.scandir(package_folder) as entries:
+            full_versions = [
+                e.name for e in entries if e.is_dir() and _FULL_VERSION_RE.match(e.name)
+            ]
         assert len(full_versions) > 0, f"No versions found for {package_folder}"
         version_map = map_versions_to_latest_major_minor(full_versions)
         for reduced, full in version_map.items():
@@ -82,42 +291,14 @@ def fill_in_versions():
             reduced_path = package_folder / reduced
             if reduced_path.exists():
                 shutil.rmtree(reduced_path)
-            shutil.copytree(full_path, reduced_path)
+            shutil.copytree(full_path, reduced_path, copy_function=clone_file)
+            full_json = os.path.join(full_path, "datapackage.json")
+            if os.path.isfile(full_json):
+                reduced_json = os.path.join(reduced_path, "datapackage.json")
+                _parsed_datapackages[reduced_json] = _load_datapackage(full_json)
             print(f"Copied {full} to {reduced}")
 
 
-def make_version_info_page(items: list[dict[str, Any]], output_dir: Path):
-    """
-    Make a page for each dataset that contains a list of all the versions
-    avaliable and major, minor, and latest versions link to another dataset
-    """
-
-    if output_dir.exists() is False:
-        output_dir.mkdir()
-    # remove existing files
-    for e in output_dir.glob("*/*.md"):
-        e.unlink()
-
-    df = pd.DataFrame(items)[["name", "title", "version", "full_version"]]
-
-    for name, d in df.groupby("name"):
-        safe_name = str(name).replace("-", "_")
-        data_dict = {
-            "name": name,
-            "title": d["title"].iloc[0],
-            "versions": {},
-            "permalink": f"/datasets/{safe_name}/versions",
-        }
-        d = d.sort_values("full_version", ascending=False)
-        for gv, rd in d.groupby("full_version"):
-            version_labels: list[str] = rd["version"].apply(str).to_list()
-            version_labels.sort()
-            data_dict["versions"][str(gv)] = version_labels
-
-        markdown_file = output_dir / f"{safe_name}.md"
-        markdown_with_frontmatter(data_dict, markdown_file)
-
-
 def collect_jekyll_data():
     """
     Collect information from data packages published to Jekyll
@@ -125,10 +306,12 @@ def collect_jekyll_data():
     """
     data_dir = get_settings()["publish_dir"] / "data"
 
-    def grab_version(package_folder: Path):
-        data = json.loads(package_folder.read_text())
+    def grab_version(datapackage_path: str, version: str):
+        # copies of the shared parse for the keys changed here
+        data = dict(_load_datapackage(datapackage_path))
+        data["custom"] = dict(data["custom"])
         data["full_version"] = data["version"]
-        data["version"] = package_folder.parent.name
+        data["version"] = version
         data["permalink"] = (
             "/datasets/" + data["name"] + "/" + data["version"].replace(".", "_")
         )
@@ -136,19 +319,12 @@ def collect_jekyll_data():
             data["custom"]["formats"] = {"csv": True, "parquet": True}
         return data
 
-    all_packages = [grab_version(d) for d in data_dir.glob("*/*/datapackage.json")]
-
-    render_sources_to_dir(
-        all_packages, output_dir=get_settings()["publish_dir"] / "_datasets"
-    )
-
-    make_version_info_page(
-        all_packages, output_dir=get_settings()["publish_dir"] / "_versionlists"
-    )
+    all_packages = [
+        grab_version(datapackage_path, version)
+        for _, version, datapackage_path in _find_datapackages(data_dir)
+    ]
 
-    render_download_format_to_dir(
-        all_packages, output_dir=get_settings()["publish_dir"] / "_downloads"
-    )
+    render_all(all_packages, get_settings()["publish_dir"])
 
 
 def collect_jekyll_data_for_package(
@@ -174,66 +350,54 @@ def collect_jekyll_data_for_package(
             package_level_download_options["download_survey"] = survey_ref
         if header_text != "default":
             package_level_download_options["download_form_header"] = header_text
+    name = package["name"]
+    version = package["version"]
+    full_version = package["full_version"]
+    url_version = version.replace(".", "_")
+    base_file = f"/data/{name}/{version}"
+
     for r in package["resources"]:
-        r["download_id"] = "_".join(
-            [package["name"], r["name"], download_format]
-        ).replace("_", "-")
+        download_id = "_".join([name, r["name"], download_format]).replace("_", "-")
         # get everything before final dot
         path_stem = r["path"][: r["path"].rfind(".")]
         path_file = path_stem + "." + download_format
-        download_data = {
-            "name": r["download_id"],
-            "permalink": "/downloads/"
-            + r["download_id"]
-            + "/"
-            + package["version"].replace(".", "_"),
-            "package": package["name"],
-            "title": r["name"],
-            "filename": path_file,
-            "version": package["version"],
-            "full_version": package["full_version"],
-            "file": f"/data/{package['name']}/{package['version']}/{path_file}",
-        }
-        download_data.update(package_level_download_options)
-        all_resources.append(download_data)
-
-    xlsx_data = {
-        "name": (package["name"] + "_xlsx").replace("_", "-"),
-        "permalink": f"/downloads/{package['name']}_xlsx/{package['version'].replace('.', '_')}",
-        "package": package["name"],
-        "title": package["name"] + "_xlsx",
-        "filename": f"{package['name']}.xlsx",
-        "version": package["version"],
-        "full_version": package["full_version"],
-        "file": f"/data/{package['name']}/{package['version']}/{package['name']}.xlsx",
-    }
-    json_data = {
-        "name": (package["name"] + "_json").replace("_", "-"),
-        "permalink": f"/downloads/{package['name']}_json/{package['version'].replace('.', '_')}",
-        "package": package["name"],
-        "title": package["name"] + "_json",
-        "filename": f"{package['name']}.json",
-        "version": package["version"],
-        "full_version": package["full_version"],
-        "file": f"/data/{package['name']}/{package['version']}/{package['name']}.json",
-    }
-    sqlite_data = {
-        "name": (package["name"] + "_sqlite").replace("_", "-"),
-        "permalink": f"/downloads/{package['name']}_sqlite/{package['version'].replace('.', '_')}",
-        "package": package["name"],
-        "title": package["name"] + "_sqlite",
-        "filename": f"{package['name']}.sqlite",
-        "version": package["version"],
-        "full_version": package["full_version"],
-        "file": f"/data/{package['name']}/{package['version']}/{package['name']}.sqlite",
-    }
-    xlsx_data.update(package_level_download_options)
-    all_resources.append(xlsx_data)
-    all_resources.append(json_data)
-    all_resources.append(sqlite_data)
+        all_resources.append(
+            {
+                "name": download_id,
+                "permalink": f"/downloads/{download_id}/{url_version}",
+                "package": name,
+                "title": r["name"],
+                "filename": path_file,
+                "version": version,
+                "full_version": full_version,
+                "file": f"{base_file}/{path_file}",
+                **package_level_download_options,
+            }
+        )
+
+    for composite_format in ("xlsx", "json", "sqlite"):
+        # only the excel download is gated
+        options = package_level_download_options if composite_format == "xlsx" else {}
+        composite_title = f"{name}_{composite_format}"
+        all_resources.append(
+            {
+                "name": composite_title.replace("_", "-"),
+                "permalink": f"/downloads/{composite_title}/{url_version}",
+                "package": name,
+                "title": composite_title,
+                "filename": f"{name}.{composite_format}",
+                "version": version,
+                "full_version": full_version,
+                "file": f"{base_file}/{name}.{composite_format}",
+                **options,
+            }
+        )
     return all_resources
 
 
 def render_jekyll():
-    fill_in_versions()
-    collect_jekyll_data()
+    try:
+        fill_in_versions()
+        collect_jekyll_data()
+    finally:
+        _parsed_datapackages.clear()
@@ -1,35 +1,47 @@
+import copy
 import hashlib
 import importlib
+import importlib.metadata
 import io
 import json
+import math
+import mmap
 import os
 import re
-import shutil
 import sqlite3
 import subprocess
 import sys
+import threading
 import warnings
-from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import closing
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from shutil import copyfile
-from typing import Any, Callable, Literal, TypedDict, TypeVar, cast
+from typing import Any, Callable, Iterator, Literal, TypedDict, TypeVar, cast
 from urllib.parse import urlencode
 
 import geopandas as gpd
 import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 import pytest
 import rich
+import yaml as pyyaml
 from frictionless import describe, validate
 from rich.table import Table
 from ruamel.yaml import YAML
 
-from data_common.db import duck_query
+from data_common.db import DuckQuery, duck_query
 
-from .jekyll_management import render_jekyll
+from .jekyll_management import clone_file, render_jekyll
 from .rich_assist import PanelPrint, df_to_table
 from .settings import get_settings
-from .table_management import SchemaValidator, update_table_schema
+from .table_management import (
+    SchemaValidator,
+    get_descriptions_from_schema,
+    update_table_schema,
+)
 from .version_management import (
     bump_version,
     is_valid_semver,
@@ -37,6 +49,393 @@ from .version_management import (
     semver_is_higher,
 )
 
+try:
+    from yaml import CSafeLoader as _BaseLoader
+except ImportError:
+    from yaml import SafeLoader as _BaseLoader
+
+    warnings.warn("PyYAML is installed without libyaml, reading yaml will be slow")
+
+
+class _SafeLoader(_BaseLoader):
+    """
+    libyaml backed loader for reading metadata.
+    Booleans and numbers follow YAML 1.2 (as ruamel, which writes these
+    files, does) - only true/false are booleans, and there are no
+    sexagesimal (10:30) or leading zero octal (0755) numbers.
+    """
+
+
+_YAML12_TAGS = [
+    "tag:yaml.org,2002:bool",
+    "tag:yaml.org,2002:int",
+    "tag:yaml.org,2002:float",
+]
+
+_SafeLoader.yaml_implicit_resolvers = {
+    first_char: [x for x in resolvers if x[0] not in _YAML12_TAGS]
+    for first_char, resolvers in _BaseLoader.yaml_implicit_resolvers.items()
+}
+_SafeLoader.add_implicit_resolver(
+    "tag:yaml.org,2002:bool",
+    re.compile(r"^(?:true|True|TRUE|false|False|FALSE)$"),
+    list("tTfF"),
+)
+# same patterns as ruamel's YAML 1.2 resolver
+_SafeLoader.add_implicit_resolver(
+    "tag:yaml.org,2002:int",
+    re.compile(
+        r"^(?:[-+]?0b[0-1_]+|[-+]?0o?[0-7_]+|[-+]?[0-9_]+|[-+]?0x[0-9a-fA-F_]+)$"
+    ),
+    list("-+0123456789"),
+)
+_SafeLoader.add_implicit_resolver(
+    "tag:yaml.org,2002:float",
+    re.compile(
+        r"""^(?:[-+]?(?:[0-9][0-9_]*)\.[0-9_]*(?:[eE][-+]?[0-9]+)?
+        |[-+]?(?:[0-9][0-9_]*)(?:[eE][-+]?[0-9]+)
+        |[-+]?\.[0-9_]+(?:[eE][-+][0-9]+)?
+        |[-+]?\.(?:inf|Inf|INF)
+        |\.(?:nan|NaN|NAN))$""",
+        re.X,
+    ),
+    list("-+0123456789."),
+)
+
+
+def _construct_yaml12_int(loader: _BaseLoader, node: pyyaml.ScalarNode) -> int:
+    """
+    YAML 1.2 ints - a leading zero is still decimal, octal needs 0o
+    """
+    value = str(loader.construct_scalar(node)).replace("_", "")
+    sign = -1 if value[0] == "-" else 1
+    value = value.lstrip("+-")
+    for prefix, base in (("0b", 2), ("0o", 8), ("0x", 16)):
+        if value.startswith(prefix):
+            return sign * int(value[2:], base)
+    return sign * int(value)
+
+
+_SafeLoader.add_constructor("tag:yaml.org,2002:int", _construct_yaml12_int)
+
+
+# values that would be read back as booleans by YAML 1.1 readers,
+# as mapping values (capitalised only) or list items (e.g. enums)
+_YES_NO_RE = re.compile(r"(?<=: )(?:No|Yes)(?=\n)|(?<=- )(?:No|Yes|no|yes)(?=\n)")
+# times get formatted incorrect as numbers
+_EXAMPLE_TIME_RE = re.compile(r"example: (\d{2}:\d{2})")
+_PRERELEASE_RE = re.compile(r"^[a-zA-Z0-9-]+$")
+
+
+def quote_ambiguous_values(yaml_str: str) -> str:
+    """
+    Quote dumped values that other yaml readers would not read back as strings
+    """
+    # horrible little patch to always put a quote around No (and in enums)
+    yaml_str = _YES_NO_RE.sub(r"'\g<0>'", yaml_str)
+
+    # times get formatted incorrect as numbers, we want to add quotes around them
+    # e.g. 'example: 21:30' should become 'example: "21:30"'
+    return _EXAMPLE_TIME_RE.sub(r'example: "\1"', yaml_str)
+
+
+def _nan_to_none(value: Any) -> Any:
+    """
+    Replace NaN floats (including numpy's) with None, so they are written
+    as null rather than a bare NaN that isn't valid json
+    """
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    if isinstance(value, dict):
+        return {k: _nan_to_none(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_nan_to_none(x) for x in value]
+    return value
+
+
+def dump_json(
+    data: Any, path: Path, default: Callable[[Any], Any] | None = None
+) -> None:
+    """
+    Write indented json, with missing (NaN) values as null
+    """
+
+    def convert(o: Any) -> Any:
+        # values made by default (e.g. arrays to lists) can hold NaN too
+        if default is None:
+            raise TypeError(f"{type(o).__name__} is not JSON serializable")
+        return _nan_to_none(default(o))
+
+    with open(path, "w") as f:
+        json.dump(_nan_to_none(data), f, indent=4, default=convert)
+
+
+def is_up_to_date(dest: Path, *sources: Path) -> bool:
+    """
+    Has dest been written since any of the sources last changed
+    """
+    if not dest.exists():
+        return False
+    written = dest.stat().st_mtime_ns
+    return all(written >= x.stat().st_mtime_ns for x in sources)
+
+
+def file_state(path: Path) -> tuple[int, int]:
+    """
+    (mtime_ns, size) of a file - used to tell when cached reads are stale
+    """
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_yaml(path: Path) -> Any:
+    """
+    Parse a yaml file with the C loader
+    """
+    with open(path, "rb") as f:
+        return pyyaml.load(f, Loader=_SafeLoader)
+
+
+DEFAULT_HASH_ALGORITHM = "sha256"
+
+
+def hash_file(path: Path, algorithm: str = "md5") -> str:
+    """
+    Hex digest of a file, read in blocks so large resources
+    are never held in memory all at once
+    """
+    digest = hashlib.new(algorithm)
+    with open(path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:  # can't map an empty file
+            return digest.hexdigest()
+        # hash straight from the page cache rather than copying into bytes
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, "madvise"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            with memoryview(mm) as view:
+                for offset in range(0, size, 1 << 22):
+                    digest.update(view[offset : offset + (1 << 22)])
+    return digest.hexdigest()
+
+
+def resource_hash(path: Path, algorithm: str = DEFAULT_HASH_ALGORITHM) -> str:
+    """
+    Change-detection hash for a resource file, prefixed with the algorithm.
+    Hashes without a prefix are legacy md5 values.
+    """
+    return f"{algorithm}:{hash_file(path, algorithm)}"
+
+
+def digest_cache_path() -> Path:
+    """
+    Persistent store of resource hashes. Kept outside the dataset folders
+    so it isn't copied into versions or committed.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "data_common" / "resource_hashes.sqlite"
+
+
+def open_digest_cache() -> sqlite3.Connection:
+    """
+    Connection to the persistent hash store, creating it if needed
+    """
+    cache_path = digest_cache_path()
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(cache_path, timeout=30)
+    with con:
+        # tables whose layout has changed are dropped and rebuilt,
+        # it is only a cache
+        layout = con.execute("PRAGMA user_version").fetchone()[0]
+        if layout < 2:  # schemas gained a version column
+            con.execute("DROP TABLE IF EXISTS schemas")
+        if layout < 3:  # validated gained a version column
+            con.execute("DROP TABLE IF EXISTS validated")
+            con.execute("PRAGMA user_version = 3")
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS hashes (path TEXT, mtime_ns INTEGER, "
+            "size INTEGER, algorithm TEXT, hash TEXT, "
+            "PRIMARY KEY (path, algorithm))"
+        )
+        # resource yaml + data file combinations that passed validation
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS validated (path TEXT PRIMARY KEY, "
+            "mtime_ns INTEGER, size INTEGER, hash TEXT, version TEXT)"
+        )
+        # table schemas inferred from data files, as json without descriptions
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS schemas (path TEXT PRIMARY KEY, "
+            "mtime_ns INTEGER, size INTEGER, version TEXT, schema TEXT)"
+        )
+    return con
+
+
+# one connection per thread (sqlite connections can't be shared between
+# threads), and the tables are only set up on the first connection
+_digest_cache_local = threading.local()
+_digest_cache_lock = threading.Lock()
+_digest_cache_ready: set[Path] = set()
+
+
+def digest_cache() -> sqlite3.Connection:
+    """
+    This thread's connection to the persistent hash store, reused between
+    lookups rather than reconnecting each time
+    """
+    cache_path = digest_cache_path()
+    current = getattr(_digest_cache_local, "connection", None)
+    if current is not None and current[0] == cache_path:
+        return current[1]
+    with _digest_cache_lock:
+        if cache_path in _digest_cache_ready:
+            con = sqlite3.connect(cache_path, timeout=30)
+        else:
+            con = open_digest_cache()
+            _digest_cache_ready.add(cache_path)
+    if current is not None:
+        current[1].close()
+    _digest_cache_local.connection = (cache_path, con)
+    return con
+
+
+def cached_resource_hash(path: Path, algorithm: str = DEFAULT_HASH_ALGORITHM) -> str:
+    """
+    resource_hash, reusing the value from a previous run if the file
+    still has the same modification time and size
+    """
+    key = (str(path.resolve()), *file_state(path), algorithm)
+    try:
+        with digest_cache() as con:
+            row = con.execute(
+                "SELECT hash FROM hashes WHERE path = ? AND mtime_ns = ? "
+                "AND size = ? AND algorithm = ?",
+                key,
+            ).fetchone()
+    except (OSError, sqlite3.Error):
+        # no usable cache, just hash the file
+        return resource_hash(path, algorithm)
+    if row:
+        return row[0]
+
+    digest = resource_hash(path, algorithm)
+    try:
+        with digest_cache() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)", (*key, digest)
+            )
+    except (OSError, sqlite3.Error):
+        pass
+    return digest
+
+
+@lru_cache
+def package_versions(*packages: str) -> str:
+    """
+    Installed versions of packages, stored with cached results that depend
+    on them so an upgrade doesn't keep serving results from the old version
+    """
+    versions = []
+    for package in packages:
+        try:
+            version = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            version = "unknown"
+        versions.append(f"{package}=={version}")
+    return " ".join(versions)
+
+
+# bump when DataResource.get_status's checks change
+VALIDATION_CACHE_VERSION = 1
+
+
+def validation_version() -> str:
+    """
+    What a recorded validation pass was checked with
+    """
+    return f"{VALIDATION_CACHE_VERSION} " + package_versions(
+        "data_common", "frictionless"
+    )
+
+
+def previously_validated(key: tuple[str, int, int, str]) -> bool:
+    """
+    Has this (resource yaml path, mtime_ns, size, data hash) passed validation
+    with the current checks and validator
+    """
+    try:
+        with digest_cache() as con:
+            row = con.execute(
+                "SELECT 1 FROM validated WHERE path = ? AND mtime_ns = ? "
+                "AND size = ? AND hash = ? AND version = ?",
+                (*key, validation_version()),
+            ).fetchone()
+    except (OSError, sqlite3.Error):
+        return False
+    return row is not None
+
+
+def record_validated(key: tuple[str, int, int, str]):
+    try:
+        with digest_cache() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO validated VALUES (?, ?, ?, ?, ?)",
+                (*key, validation_version()),
+            )
+    except (OSError, sqlite3.Error):
+        pass
+
+
+# bump when update_table_schema's output changes
+SCHEMA_CACHE_VERSION = 1
+
+
+def cached_table_schema(path: Path) -> SchemaValidator:
+    """
+    update_table_schema for a data file (without descriptions), reusing
+    the result from a previous run if the file still has the same
+    modification time and size, and the same code and pandas produced it
+    """
+    version = f"{SCHEMA_CACHE_VERSION} " + package_versions("data_common", "pandas")
+    key = (str(path.resolve()), *file_state(path), version)
+    try:
+        with digest_cache() as con:
+            row = con.execute(
+                "SELECT schema FROM schemas WHERE path = ? AND mtime_ns = ? "
+                "AND size = ? AND version = ?",
+                key,
+            ).fetchone()
+    except (OSError, sqlite3.Error):
+        row = None
+    if row:
+        return json.loads(row[0])
+
+    schema = update_table_schema(path, None)
+    # only keep if json gives back exactly the same thing (not e.g. dates)
+    try:
+        encoded = json.dumps(schema)
+    except (TypeError, ValueError):
+        return schema
+    if json.loads(encoded) != schema:
+        return schema
+    try:
+        with digest_cache() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO schemas VALUES (?, ?, ?, ?, ?)",
+                (*key, encoded),
+            )
+    except (OSError, sqlite3.Error):
+        pass
+    return schema
+
+
+def hash_algorithm(stored_hash: str) -> str:
+    """
+    Algorithm used for a stored resource hash
+    """
+    if ":" in stored_hash:
+        return stored_hash.split(":", 1)[0]
+    return "md5"
+
 
 def diff_dicts(a: dict, b: dict, missing=KeyError):
     """
@@ -92,16 +491,53 @@ def color_print(item: str, color: alert_colors, new_line: bool = True) -> None:
 @dataclass
 class DataResource:
     path: Path
+    # ((mtime_ns, size), algorithm, hash) of the last time the file was hashed
+    _hash: tuple[tuple[int, int], str, str] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # ((mtime_ns, size), parsed yaml) of the resource yaml
+    _resource_cache: tuple[tuple[int, int], dict[str, Any]] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     @property
     def slug(self) -> str:
         return self.path.stem
 
+    def get_hash_algorithm(self) -> str:
+        """
+        Keep using the algorithm of the stored hash where every machine
+        has it. Legacy md5 hashes are replaced with the default.
+        """
+        if self.has_resource_yaml:
+            stored_hash = self.read_resource_yaml().get("hash")
+            if stored_hash:
+                algorithm = hash_algorithm(stored_hash)
+                if algorithm != "md5" and algorithm in hashlib.algorithms_guaranteed:
+                    return algorithm
+        return DEFAULT_HASH_ALGORITHM
+
+    def get_hash(self) -> str:
+        """
+        Hash of the resource file, reused until the file changes
+        """
+        key = file_state(self.path)
+        algorithm = self.get_hash_algorithm()
+        if self._hash is None or self._hash[:2] != (key, algorithm):
+            digest = cached_resource_hash(self.path, algorithm)
+            self._hash = (key, algorithm, digest)
+        return self._hash[2]
+
     def get_order(self, native_order: int = 999) -> int:
         """
         Get a sheet order if one has been set
         """
-        desc = self.get_resource()
+        # called for every resource on each resources() call - when the yaml
+        # is unchanged this is a single stat, no exists() check first
+        try:
+            desc = self.read_resource_yaml()
+        except FileNotFoundError:
+            desc = {}
         old_style = desc.get("_sheet_order", None)
         if old_style:
             return old_style
@@ -127,7 +563,7 @@ class DataResource:
 
         problems: list[tuple[str, str]] = []
 
-        desc = self.get_resource()
+        desc = self.read_resource_yaml()
         if not desc["title"]:
             problems.append(("title", "resource"))
         if not desc["description"]:
@@ -151,35 +587,84 @@ class DataResource:
             return "No resource file", "red"
         if desc_error := self.validate_descriptions():
             return desc_error, "red"
+        # skip a full validation if neither the yaml or the data has changed
+        # since it last passed
+        key = (
+            str(self.resource_path.resolve()),
+            *file_state(self.resource_path),
+            self.get_hash(),
+        )
+        if previously_validated(key):
+            return "Valid resource", "green"
         valid_check = validate(self.resource_path)
         if valid_check["stats"]["errors"] > 0:
             return valid_check["tasks"][0]["errors"], "red"
+        record_validated(key)
         return "Valid resource", "green"
 
-    def get_df(self) -> pd.DataFrame:
+    def get_columns(self) -> list[str]:
+        """
+        Column names of the resource, without reading any rows
+        """
+        if self.path.suffix == ".csv":
+            return list(pd.read_csv(self.path, nrows=0).columns)
+        elif self.path.suffix == ".parquet":
+            schema = pq.read_schema(self.path)
+            # a stored index is restored as the index, not a column
+            index_columns = (schema.pandas_metadata or {}).get("index_columns", [])
+            return [x for x in schema.names if x not in index_columns]
+        else:
+            raise ValueError(f"Unhandled file type {self.path.suffix}")
+
+    def get_df(
+        self, columns: list[str] | None = None, exclude: list[str] | None = None
+    ) -> pd.DataFrame:
         """
         Get a dataframe of the resource
+        If columns is given, only those columns are read from the file,
+        excluded columns are never read.
         """
+        if exclude:
+            columns = [x for x in columns or self.get_columns() if x not in exclude]
         # if is csv
         if self.path.suffix == ".csv":
-            return pd.read_csv(self.path)
+            return pd.read_csv(self.path, usecols=columns)
         # if parquet
         elif self.path.suffix == ".parquet":
-            return pd.read_parquet(self.path)
+            table = pq.read_table(self.path, columns=columns, use_pandas_metadata=True)
+            # free arrow memory column by column as it moves into pandas
+            return table.to_pandas(split_blocks=True, self_destruct=True)
         else:
             raise ValueError(f"Unhandled file type {self.path.suffix}")
 
+    def read_resource_yaml(self) -> dict[str, Any]:
+        """
+        Parsed resource yaml, only re-read when the file changes.
+        This is shared between calls, so use get_resource for a copy
+        that is safe to modify.
+        """
+        key = file_state(self.resource_path)
+        if self._resource_cache is None or self._resource_cache[0] != key:
+            self._resource_cache = (key, load_yaml(self.resource_path))
+        return self._resource_cache[1]
+
     def get_resource(
-        self, inline_data: bool = False, is_geodata: bool = False
+        self,
+        inline_data: bool = False,
+        is_geodata: bool = False,
+        df: pd.DataFrame | None = None,
     ) -> dict[str, Any]:
+        """
+        Copy of the resource description.
+        If inline_data, the data is added from df, or read from the file
+        if df is not given.
+        """
         if self.has_resource_yaml:
-            yaml = YAML(typ="safe")
-            with self.resource_path.open("r") as f:
-                resource = yaml.load(f)
+            resource = copy.deepcopy(self.read_resource_yaml())
             if inline_data:
-                df = self.get_df()
-                if is_geodata and "geometry" in df.columns:
-                    df = df.drop(columns=["geometry"])
+                if df is None:
+                    # don't read the geometry at all, rather than dropping it after
+                    df = self.get_df(exclude=["geometry"] if is_geodata else None)
                 resource["data"] = df.fillna(value="").to_dict(orient="records")
                 resource["format"] = "json"
                 del resource["scheme"]
@@ -191,14 +676,11 @@ class DataResource:
     def get_metadata_df(self) -> pd.DataFrame:
         if self.has_resource_yaml is False:
             raise ValueError("Trying to get metadata for {self.slug}, but not present.")
-        resource = self.get_resource()
+        resource = self.read_resource_yaml()
         df = pd.DataFrame(resource["schema"]["fields"])
-        df["unique"] = df["constraints"].apply(
-            lambda x: "Yes" if x.get("unique", False) else "No"
-        )
-        df["options"] = df["constraints"].apply(
-            lambda x: ", ".join([str(x) for x in x.get("enum", [])])
-        )
+        constraints = df["constraints"].tolist()
+        df["unique"] = ["Yes" if x.get("unique", False) else "No" for x in constraints]
+        df["options"] = [", ".join(map(str, x.get("enum", []))) for x in constraints]
         df = df.drop(columns=["constraints"]).rename(columns={"name": "column"})
         df = df[["column", "description", "type", "example", "unique", "options"]]
         return df
@@ -206,7 +688,13 @@ class DataResource:
     def get_schema_from_file(
         self, existing_schema: SchemaValidator | None
     ) -> SchemaValidator:
-        return update_table_schema(self.path, existing_schema)
+        schema = cached_table_schema(self.path)
+        descriptions = (
+            get_descriptions_from_schema(existing_schema) if existing_schema else {}
+        )
+        for schema_field in schema["fields"]:
+            schema_field["description"] = descriptions.get(schema_field["name"], None)
+        return schema
 
     def rebuild_yaml(self, is_geodata: bool = False):
         """
@@ -240,50 +728,62 @@ class DataResource:
                 "Resource must be csv or paraquet, update this function if extending past that."
             )
 
-        # get number of rows in resource
+        # get hash of resource
+        file_hash = self.get_hash()
 
-        rows = duck_query(
-            "SELECT COUNT(*) FROM {{ file_path }}", file_path=resource_path
-        ).int()
+        # get number of rows in resource
+        # the count only changes with the file, so if the hash matches the
+        # previous yaml, reuse the stored count rather than scanning again
+        rows = existing_desc.get("custom", {}).get("row_count")
+        if rows is None or existing_desc.get("hash") != file_hash:
+            if resource_path.suffix == ".parquet":
+                # stored in the footer, no need to scan the file
+                rows = pq.ParquetFile(resource_path).metadata.num_rows
+            else:
+                rows = duck_query(
+                    "SELECT COUNT(*) FROM {{ file_path }}", file_path=resource_path
+                ).int()
 
         # update number of rows in resource (custom)
         new_dict["custom"]["row_count"] = rows
 
-        # get md5 hash of resource
-        with open(resource_path, "rb") as f:
-            md5 = hashlib.md5(f.read()).hexdigest()
-        new_dict["hash"] = md5
+        new_dict["hash"] = file_hash
 
         yaml = YAML()
         yaml.default_flow_style = False
 
-        # dump yaml to a textio stream
         with io.StringIO() as f:
-            yaml.dump(new_dict, f)
+            yaml.dump(new_dict, f, transform=quote_ambiguous_values)
             yaml_str = f.getvalue()
 
-        # horrible little patch to always put a quote around No
-        yaml_str = yaml_str.replace(": No\n", ": 'No'\n")
-        yaml_str = yaml_str.replace(": Yes\n", ": 'Yes'\n")
-
-        # and in enums
-        yaml_str = yaml_str.replace("- No\n", "- 'No'\n")
-        yaml_str = yaml_str.replace("- Yes\n", "- 'Yes'\n")
-        yaml_str = yaml_str.replace("- no\n", "- 'no'\n")
-        yaml_str = yaml_str.replace("- yes\n", "- 'yes'\n")
-
-        # times get formatted incorrect as numbers, we want to add quotes around them
-        # e.g. 'example: 21:30' should become 'example: "21:30"'
-        yaml_str = re.sub(r"example: (\d{2}:\d{2})", r'example: "\1"', yaml_str)
-
-        with self.resource_path.open("w") as f:
-            f.write(yaml_str)
+        # leave an unchanged file alone, so its mtime only moves on real changes
+        # (and dependent build files aren't remade)
+        if self.has_resource_yaml and self.resource_path.read_text() == yaml_str:
+            return
+        self.resource_path.write_text(yaml_str)
+        self._resource_cache = None
         print(f"Updated config for {self.slug} to {self.resource_path}")
 
 
 @dataclass
 class DataPackage:
     path: Path
+    # ((mtime_ns, size), parsed yaml) of datapackage.yaml
+    _datapackage_cache: tuple[tuple[int, int], dict[str, Any]] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # (mtime_ns of the package directory, resources found in it)
+    _resources_cache: tuple[int, list[DataResource]] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # (state of datapackage and resource yamls, built json representation)
+    _json_cache: tuple[tuple, dict[str, Any]] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # resource dataframes shared between the builders in build_composites
+    _composite_dfs: dict[str, Future] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     @property
     def slug(self) -> str:
@@ -311,7 +811,7 @@ class DataPackage:
         """
         old_stdout = None
         test_dir = self.path.parent.parent.parent / "tests"
-        desc = self.get_datapackage()
+        desc = self.read_datapackage()
         tests = desc["custom"].get("tests", [])
         tests = [x + ".py" for x in tests]
         if tests == []:
@@ -342,7 +842,7 @@ class DataPackage:
         """
         Function to build data from a function specified in a module.
         """
-        desc = self.get_datapackage()
+        desc = self.read_datapackage()
         build_module = desc.get("custom", {}).get("build", "")
         build_module = build_module.strip() if build_module else ""
         if not build_module:
@@ -371,7 +871,7 @@ class DataPackage:
         """
         Get the current version of the datapackage.yaml file.
         """
-        desc = self.get_datapackage()
+        desc = self.read_datapackage()
         version = str(desc["version"])
         if len(version.split(".")) == 2:
             version += ".0"
@@ -478,6 +978,11 @@ class DataPackage:
         previous_data = previous_datapackage.get_current_datapackage_json()
         del current_data["custom"]
         del previous_data["custom"]
+        self.align_hash_algorithms(previous_data, current_data)
+
+        # nothing has changed - skip walking through every check below
+        if current_data == previous_data:
+            return None
 
         # Following https://specs.frictionlessdata.io/patterns/#data-package-version
         # With the exception of adding new fields (at the end of the CSV), which is a new feature, and so a minor change.
@@ -501,21 +1006,16 @@ class DataPackage:
         # Add, remove or re-order fields
         # Also check if an old resource has been removed
         # With the exception of adding new fields (at the end of the CSV), which is a new feature, and so a minor change.
+        current_resources = {x["name"]: x for x in current_data["resources"]}
         for previous_resource in previous_data["resources"]:
-            current_resource = [
-                x
-                for x in current_data["resources"]
-                if x["name"] == previous_resource["name"]
-            ]
+            current_resource = current_resources.get(previous_resource["name"])
             # check still exists
-            if len(current_resource) == 0:
+            if current_resource is None:
                 return (
                     MAJOR,
                     f"Existing resource {previous_resource['title']} renamed or deleted",
                 )
 
-            current_resource = current_resource[0]
-
             # custom check here - is there a difference in the _sheet_order property?
             if previous_resource.get("_sheet_order") != current_resource.get(
                 "_sheet_order"
@@ -543,8 +1043,9 @@ class DataPackage:
                     # added fields
                     # This is ok if fields are at the end
                     # check if new stuff is only at the end
+                    previous_field_set = set(previous_field_names)
                     new_fields = [
-                        x for x in current_field_names if x not in previous_field_names
+                        x for x in current_field_names if x not in previous_field_set
                     ]
                     new_fields = ",".join(new_fields)
                     if (
@@ -661,11 +1162,7 @@ class DataPackage:
         resource_level_description_variables = ["title", "description", "keywords"]
         field_schema_level_description_variables = ["description", "example"]
         for previous_resource in previous_data["resources"]:
-            current_resource = [
-                x
-                for x in current_data["resources"]
-                if x["name"] == previous_resource["name"]
-            ][0]
+            current_resource = current_resources[previous_resource["name"]]
             for variable in resource_level_description_variables:
                 if (p_variable := previous_resource.get(variable)) != (
                     c_variable := current_resource.get(variable)
@@ -676,14 +1173,12 @@ class DataPackage:
                     )
 
             previous_schema_fields = previous_resource["schema"]["fields"]
-            current_schema_fields = current_resource["schema"]["fields"]
+            current_schema_fields = {
+                x["name"]: x for x in current_resource["schema"]["fields"]
+            }
             for variable in field_schema_level_description_variables:
                 for previous_field in previous_schema_fields:
-                    current_field = [
-                        x
-                        for x in current_schema_fields
-                        if x["name"] == previous_field["name"]
-                    ][0]
+                    current_field = current_schema_fields[previous_field["name"]]
                     if (p_variable := previous_field.get(variable)) != (
                         c_variable := current_field.get(variable)
                     ):
@@ -701,6 +1196,35 @@ class DataPackage:
                 "There is a difference between the two files, not captured by the bump rule detection"
             )
 
+    def align_hash_algorithms(
+        self, previous_data: dict[str, Any], current_data: dict[str, Any]
+    ):
+        """
+        Where a stored resource hash was made with a different algorithm
+        (e.g. legacy md5), rehash the current file with that algorithm.
+        If they match, carry over the previous hash so an unchanged file
+        is not reported as a change.
+        """
+        previous_hashes = {
+            x["name"]: x.get("hash", "") for x in previous_data["resources"]
+        }
+        for resource in current_data["resources"]:
+            previous_hash = previous_hashes.get(resource["name"])
+            current_hash = resource.get("hash", "")
+            if not previous_hash or not current_hash:
+                continue
+            algorithm = hash_algorithm(previous_hash)
+            if algorithm == hash_algorithm(current_hash):
+                continue
+            if algorithm not in hashlib.algorithms_available:
+                continue
+            resource_path = self.path / resource["path"]
+            if not resource_path.exists():
+                continue
+            rehashed = hash_file(resource_path, algorithm)
+            if previous_hash.split(":")[-1] == rehashed:
+                resource["hash"] = previous_hash
+
     def bump_version_to(
         self,
         new_semver: str,
@@ -715,7 +1239,7 @@ class DataPackage:
             version = version.split("-")[0]
         desc = self.get_datapackage()
         # check if prerelease is valid format, only ASCII alphanumerics and hyphens
-        if prerelease and not re.match(r"^[a-zA-Z0-9-]+$", prerelease):
+        if prerelease and not _PRERELEASE_RE.match(prerelease):
             raise ValueError("Prerelease must be ASCII alphanumerics and hyphens")
         if prerelease:
             new_semver = f"{new_semver}-{prerelease}"
@@ -758,12 +1282,12 @@ class DataPackage:
         store all files in the top level directory of the package in a folder for this version.
         """
         top_level = self.path
-        version = self.get_datapackage()["version"]
+        version = self.read_datapackage()["version"]
         version_dir = top_level / "versions" / version
         version_dir.mkdir(parents=True, exist_ok=True)
         for file in top_level.iterdir():
             if file.is_dir() is False:
-                shutil.copy(file, version_dir / file.name)
+                clone_file(file, version_dir / file.name)
 
     def update_yaml(self, new_values: dict[str, Any]):
         """
@@ -775,6 +1299,7 @@ class DataPackage:
         yaml.default_flow_style = False
         with open(self.datapackage_path, "w") as f:
             yaml.dump(desc, f)
+        self._datapackage_cache = None
 
     def build_path(self, version: str = "") -> Path:
         if version == "":
@@ -788,18 +1313,31 @@ class DataPackage:
         if self.datapackage_path.exists() is False:
             raise ValueError(f"No datapackage.yaml found in {self.path}")
 
-    def resources(self) -> dict[str, DataResource]:
+    def _find_resources(self) -> list[DataResource]:
         # a resource can be a csv or a parquet file
-        resources = [DataResource(path=x) for x in self.path.glob("*.csv")]
-        resources += [DataResource(path=x) for x in self.path.glob("*.parquet")]
+        with os.scandir(self.path) as it:
+            resources = [
+                DataResource(path=Path(x.path))
+                for x in it
+                if os.path.splitext(x.name)[1] in (".csv", ".parquet") and x.is_file()
+            ]
 
         # check there aren't any csvs and paraquets with the same name
         if len(set([x.path.stem for x in resources])) != len(resources):
             raise ValueError(
                 f"Found multiple resources with the same name in {self.path}"
             )
+        return resources
 
-        resources.sort(key=lambda x: x.slug)
+    def resources(self) -> dict[str, DataResource]:
+        # only search the directory again when files are added or removed,
+        # keeping the same DataResource objects (and their caches) otherwise
+        mtime = self.path.stat().st_mtime_ns
+        if self._resources_cache is None or self._resources_cache[0] != mtime:
+            self._resources_cache = (mtime, self._find_resources())
+
+        # order can be changed in the resource yaml, so always re-sort
+        resources = sorted(self._resources_cache[1], key=lambda x: x.slug)
         new_order = {r.slug: r.get_order(n) for n, r in enumerate(resources)}
         resources.sort(key=lambda x: new_order[x.slug])
         return {x.slug: x for x in resources}
@@ -815,7 +1353,7 @@ class DataPackage:
             + "datasets/"
             + self.slug.replace("-", "_")
             + "/"
-            + self.get_datapackage()["version"].replace(".", "_")
+            + self.read_datapackage()["version"].replace(".", "_")
         )
         if "datasets/datasets" in url:
             url = url.replace("/datasets/datasets/", "/datasets/")
@@ -827,20 +1365,48 @@ class DataPackage:
 
     def rebuild_all_resources(self):
         is_geodata = self.is_geodata()
-        for resource in self.resources().values():
+        resources = list(self.resources().values())
+
+        # hash the files concurrently - hashlib releases the GIL
+        max_workers = min(8, os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(r.get_hash) for r in resources]
+            for future in as_completed(futures):
+                future.result()
+
+        for resource in resources:
             resource.rebuild_yaml(is_geodata=is_geodata)
 
     def is_geodata(self) -> bool:
-        desc = self.get_datapackage()
+        desc = self.read_datapackage()
         return desc["custom"].get("is_geodata", False)
 
+    def read_datapackage(self) -> dict[str, Any]:
+        """
+        Parsed datapackage.yaml, only re-read when the file changes.
+        This is shared between calls, so use get_datapackage for a copy
+        that is safe to modify.
+        """
+        key = file_state(self.datapackage_path)
+        if self._datapackage_cache is None or self._datapackage_cache[0] != key:
+            self._datapackage_cache = (key, load_yaml(self.datapackage_path))
+        return self._datapackage_cache[1]
+
     def get_datapackage(self) -> dict[str, Any]:
-        yaml = YAML(typ="safe")
-        with open(self.datapackage_path, "r"):
-            return yaml.load(self.datapackage_path)
+        """
+        Contents of datapackage.yaml, each call gets its own copy.
+        """
+        return copy.deepcopy(self.read_datapackage())
 
-    def validate(self, quiet: bool = False) -> ValidationErrors:
-        desc = self.get_datapackage()
+    def validate(
+        self, quiet: bool = False, check_build: bool = False
+    ) -> ValidationErrors:
+        """
+        Check the package description, tests and resources.
+        If check_build is set, also run the full validator against the
+        built datapackage.json (this reads every resource).
+        """
+        desc = self.read_datapackage()
         validation_errors: ValidationErrors = []
         if not desc.get("description", ""):
             validation_errors.append(("Missing package description", "red"))
@@ -850,20 +1416,41 @@ class DataPackage:
             validation_errors.append(("Missing package licence", "red"))
         if self.test_package(quiet) is False:
             validation_errors.append(("Tests failed", "red"))
-        for r in self.resources().values():
-            if r.get_status()[1] == "red":
-                validation_errors.append((f"Invalid resource {r.slug}", "red"))
+        for slug, (_, color) in self.resource_statuses().items():
+            if color == "red":
+                validation_errors.append((f"Invalid resource {slug}", "red"))
+        if check_build:
+            build_json = self.build_path() / "datapackage.json"
+            if not build_json.exists():
+                validation_errors.append(("Package has not been built", "red"))
+            else:
+                with warnings.catch_warnings():
+                    warnings.filterwarnings("ignore")
+                    valid_results = validate(build_json, type="package")
+                if valid_results["stats"]["errors"] > 0:
+                    validation_errors.append(("Built package is invalid", "red"))
         return validation_errors
 
+    def resource_statuses(self) -> dict[str, tuple[str, alert_colors]]:
+        """
+        get_status for each resource, checked concurrently as it is mostly
+        hashing and file reads
+        """
+        resources = self.resources()
+        max_workers = min(8, os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            statuses = executor.map(DataResource.get_status, resources.values())
+            return dict(zip(resources, statuses))
+
     def past_versions(self):
         """
         get a list of previous versions as avaliable in the versions folder
         """
-        versions = []
-        for version in self.path.glob("versions/*"):
-            if version.is_dir():
-                versions.append(version.name)
-        return versions
+        try:
+            with os.scandir(self.path / "versions") as it:
+                return [x.name for x in it if x.is_dir()]
+        except FileNotFoundError:
+            return []
 
     def build_missing_previous_versions(self):
         """
@@ -878,7 +1465,7 @@ class DataPackage:
                 previous = self.__class__(self.path / "versions" / v)
                 previous.build_package()
 
-    def build_package(self):
+    def build_package(self, force: bool = False):
         """
         Build package files and move to jekyll directory
         """
@@ -890,35 +1477,44 @@ class DataPackage:
         self.build_json()
         color_print("✔️", "green")
         color_print("Copying resources", "blue", new_line=False)
-        self.copy_resources()
+        self.copy_resources(force)
         color_print("✔️", "green")
         color_print("Checking package validity", "blue", new_line=False)
         self.check_build_integrity()
         color_print("✔️", "green")
         color_print("Building composite files", "blue", new_line=False)
-        self.build_composites()
+        self.build_composites(force)
         color_print("✔️", "green")
 
     def check_build_integrity(self):
         """
-        run the validator against the data pacakge
+        Cheap structural check of the built package - the json parses and
+        every resource it lists was copied.
+        The full validator reads every resource, so is left to
+        `dataset validate --check-build`.
         """
+        build_path = self.build_path()
+        datapackage = json.loads((build_path / "datapackage.json").read_text())
+        missing = [
+            r["path"]
+            for r in datapackage["resources"]
+            if not (build_path / r["path"]).exists()
+        ]
+        if missing:
+            raise ValueError(f"Resources missing from build: {missing}")
 
-        with warnings.catch_warnings():
-            warnings.filterwarnings("ignore")
-            valid_results = validate(
-                self.build_path() / "datapackage.json", type="package"
-            )
-        if valid_results["stats"]["errors"] > 0:
-            raise ValueError(valid_results)
-
-    def copy_resources(self):
+    def copy_resources(self, force: bool = False):
         """
         Copy the CSV/parquet over and create the opposite item.
         Use DUCKDB to make the conversion robust for larger files.
+        Outputs already made from the current source file are skipped,
+        unless force is set.
         """
 
-        desc = self.get_datapackage()
+        def needs_writing(dest: Path, source: Path) -> bool:
+            return force or not is_up_to_date(dest, source)
+
+        desc = self.read_datapackage()
         formats = desc.get("custom", {}).get("formats", {})
         csv_value = formats.get("csv", True)
         parquet_value = formats.get("parquet", True)
@@ -939,55 +1535,90 @@ class DataPackage:
         copy (select * {{ exclude }} from {{ source }}) to {{ dest }} (HEADER, DELIMITER ',');
         """
 
-        for r in self.resources().values():
-            # need to have seperate handling for csv and paraquet
-            if r.path.suffix == ".csv":
-                if csv_value:
-                    copyfile(r.path, self.build_path() / r.path.name)
-                if parquet_value:
-                    parquet_file = self.build_path() / (r.path.stem + ".parquet")
-                    duck_query(csv_copy_query, source=r.path, dest=parquet_file).run()
-                if geojson_value or geopackage_value:
-                    raise ValueError(
-                        "Writing to geojson/geopackage from csv source not supported. Use parquet internally."
+        build_path = self.build_path()
+
+        # share one connection between all the conversions
+        duck = DuckQuery()
+        try:
+            for r in self.resources().values():
+                # need to have seperate handling for csv and paraquet
+                if r.path.suffix == ".csv":
+                    csv_file = build_path / r.path.name
+                    if csv_value and needs_writing(csv_file, r.path):
+                        clone_file(r.path, csv_file)
+                    parquet_file = build_path / (r.path.stem + ".parquet")
+                    if parquet_value and needs_writing(parquet_file, r.path):
+                        duck.query(
+                            csv_copy_query, source=r.path, dest=parquet_file
+                        ).run()
+                    if geojson_value or geopackage_value:
+                        raise ValueError(
+                            "Writing to geojson/geopackage from csv source not supported. Use parquet internally."
+                        )
+                elif r.path.suffix == ".parquet":
+                    parquet_file = build_path / r.path.name
+                    if parquet_value and needs_writing(parquet_file, r.path):
+                        clone_file(r.path, parquet_file)
+                    csv_file = build_path / (r.path.stem + ".csv")
+                    if csv_value and needs_writing(csv_file, r.path):
+                        duck.query(
+                            parquet_copy_query,
+                            exclude=exclude,
+                            source=r.path,
+                            dest=csv_file,
+                        ).run()
+                    geojson_path = build_path / (r.path.stem + ".geojson")
+                    geopackage_path = build_path / (r.path.stem + ".gpkg")
+                    write_geojson = geojson_value and needs_writing(
+                        geojson_path, r.path
+                    )
+                    write_geopackage = geopackage_value and needs_writing(
+                        geopackage_path, r.path
                     )
-            elif r.path.suffix == ".parquet":
-                if parquet_value:
-                    copyfile(r.path, self.build_path() / r.path.name)
-                if csv_value:
-                    csv_file = self.build_path() / (r.path.stem + ".csv")
-                    duck_query(
-                        parquet_copy_query,
-                        exclude=exclude,
-                        source=r.path,
-                        dest=csv_file,
-                    ).run()
-                if geojson_value:
-                    geojson_path = self.build_path() / (r.path.stem + ".geojson")
-                    gdf = gpd.read_parquet(r.path)
-                    gdf.to_file(geojson_path, driver="GeoJSON")
-                if geopackage_value:
-                    geopackage_path = self.build_path() / (r.path.stem + ".gpkg")
-                    gdf = gpd.read_parquet(r.path)
-                    gdf.to_file(geopackage_path, driver="GPKG")
+                    if write_geojson or write_geopackage:
+                        # read once for both geo formats
+                        gdf = gpd.read_parquet(r.path)
+                        if write_geojson:
+                            gdf.to_file(geojson_path, driver="GeoJSON")
+                        if write_geopackage:
+                            gdf.to_file(geopackage_path, driver="GPKG")
+        finally:
+            duck.ddb.close()
 
     def get_datapackage_order(self) -> int:
         """
         Get any priority order between the datasets
         """
-        datapackage = self.get_datapackage()
-        if "custom" not in datapackage:
-            datapackage["custom"] = {}
-            if "dataset_order" not in datapackage["custom"]:
-                datapackage["custom"]["dataset_order"] = 999
-        return datapackage["custom"]["dataset_order"]
+        datapackage = self.read_datapackage()
+        return datapackage.get("custom", {}).get("dataset_order", 999)
 
     def get_current_datapackage_json(self) -> dict[str, Any]:
         """
         Get a dictionary representation of the current datapackage
+        Reused until the datapackage or any resource yaml changes, each
+        call gets its own copy.
         """
-        datapackage = self.get_datapackage()
-        datapackage["resources"] = [x.get_resource() for x in self.resources().values()]
+        resources = self.resources()
+        key = (
+            file_state(self.datapackage_path),
+            tuple(
+                (slug, r.has_resource_yaml and file_state(r.resource_path))
+                for slug, r in resources.items()
+            ),
+        )
+        if self._json_cache is None or self._json_cache[0] != key:
+            self._json_cache = (key, self._build_datapackage_json(resources))
+        return copy.deepcopy(self._json_cache[1])
+
+    def _build_datapackage_json(
+        self, resources: dict[str, DataResource]
+    ) -> dict[str, Any]:
+        url = self.url
+        # shallow copy of the shared parse - only custom is changed below,
+        # and that is replaced with a copy rather than modified
+        datapackage = dict(self.read_datapackage())
+        datapackage["custom"] = dict(datapackage.get("custom", {}))
+        datapackage["resources"] = [x.get_resource() for x in resources.values()]
         for resource in datapackage["resources"]:
             if "custom" not in resource:
                 resource["custom"] = {}
@@ -996,17 +1627,15 @@ class DataPackage:
             if "about" not in resource["custom"]["datasette"]:
                 resource["custom"]["datasette"]["about"] = "Info & Downloads"
                 resource["custom"]["datasette"]["about_url"] = (
-                    f"{self.url}#{resource['name']}"
+                    f"{url}#{resource['name']}"
                 )
-        if "custom" not in datapackage:
-            datapackage["custom"] = {}
         if "dataset_order" not in datapackage["custom"]:
             datapackage["custom"]["dataset_order"] = 999
         if "datasette" not in ["custom"]:
             datapackage["custom"]["datasette"] = {}
             if "about" not in datapackage["custom"]["datasette"]:
                 datapackage["custom"]["datasette"]["about"] = "Info & Downloads"
-                datapackage["custom"]["datasette"]["about_url"] = self.url
+                datapackage["custom"]["datasette"]["about_url"] = url
         return datapackage
 
     def build_json(self):
@@ -1014,15 +1643,14 @@ class DataPackage:
         Create full json datapackage file for all resources
         """
         datapackage = self.get_current_datapackage_json()
-        with open(self.build_path() / "datapackage.json", "w") as f:
-            json.dump(datapackage, f, indent=4)
+        dump_json(datapackage, self.build_path() / "datapackage.json")
 
     def survey_url(self) -> str:
         """
         link to the info gathering custom survey relevant for this survey
         Either constructs from the pyproject default, or
         """
-        desc = self.get_datapackage()
+        desc = self.read_datapackage()
         settings = get_settings()
         default_survey_url = settings["credit_url"]
         specific_alchemer: str | None = (
@@ -1040,7 +1668,7 @@ class DataPackage:
     def build_coversheet(
         self, writer: pd.ExcelWriter, allowed_sheets: list[str]
     ) -> pd.ExcelWriter:
-        desc = self.get_datapackage()
+        desc = self.read_datapackage()
         settings = get_settings()
 
         bold = writer.book.add_format({"bold": True})  # type: ignore
@@ -1098,9 +1726,7 @@ class DataPackage:
                 row += 1
 
         row += 2
-        ws.write(row, 2, "Sheet", bold)
-        ws.write(row, 3, "Metadata", bold)
-        ws.write(row, 4, "Sheet description", bold)
+        ws.write_row(row, 2, ["Sheet", "Metadata", "Sheet description"], bold)
         row += 1
 
         # sort sheets in order
@@ -1112,7 +1738,7 @@ class DataPackage:
         for r in self.resources().values():
             if r.slug not in allowed_sheets:
                 continue
-            desc = r.get_resource()
+            desc = r.read_resource_yaml()
             ws.write_url(row, 2, f"internal:{r.slug}!A1", string=desc["title"])
             ws.write(row, 4, desc["description"])
             row += 1
@@ -1163,7 +1789,18 @@ class DataPackage:
 
         return composite_options
 
-    def build_excel(self, is_geodata: bool = False):
+    def composite_inputs(self) -> list[Path]:
+        """
+        Files the composite files are built from
+        """
+        paths = [self.datapackage_path]
+        for r in self.resources().values():
+            paths.append(r.path)
+            if r.has_resource_yaml:
+                paths.append(r.resource_path)
+        return paths
+
+    def build_excel(self, is_geodata: bool = False, force: bool = False):
         """
         Build a single excel file for all resources
         """
@@ -1173,60 +1810,69 @@ class DataPackage:
             rich.print("[red]Skipping Excel build[/red]")
             return None
 
+        excel_path = self.build_path() / f"{self.slug}.xlsx"
+        if not force and is_up_to_date(excel_path, *self.composite_inputs()):
+            return None
+
         allowed_resource_slugs = [
             x
             for x in composite_options["include"]
             if x not in composite_options["exclude"]
         ]
 
-        sheets: dict[str, pd.DataFrame] = {}
-
         metadata_sheets: list[pd.DataFrame] = []
 
-        for slug, resource in self.resources().items():
-            if slug in allowed_resource_slugs:
-                mdf = resource.get_metadata_df()
-                mdf["resource"] = slug
-                metadata_sheets.append(mdf)
-
-        metadata_df = pd.concat(metadata_sheets)
-
-        sheets["data_description"] = metadata_df
+        resources = {
+            slug: resource
+            for slug, resource in self.resources().items()
+            if slug in allowed_resource_slugs
+        }
 
-        for slug, resource in self.resources().items():
-            if slug in allowed_resource_slugs:
-                sheets[slug] = resource.get_df()
+        for slug, resource in resources.items():
+            mdf = resource.get_metadata_df()
+            mdf["resource"] = slug
+            metadata_sheets.append(mdf)
 
-        excel_path = self.build_path() / f"{self.slug}.xlsx"
+        metadata_df = pd.concat(metadata_sheets)
 
-        writer = pd.ExcelWriter(excel_path)
+        def get_sheets() -> Iterator[tuple[str, pd.DataFrame]]:
+            # read each resource as it is written, rather than all up front
+            yield "data_description", metadata_df
+            for slug, resource in resources.items():
+                yield slug, self.get_composite_df(resource, is_geodata)
+
+        # build_coversheet and the formats below need xlsxwriter
+        # data is written as plain strings, rather than checking every string
+        # cell for something that looks like a url to turn into a link
+        writer = pd.ExcelWriter(
+            excel_path,
+            engine="xlsxwriter",
+            engine_kwargs={"options": {"strings_to_urls": False}},
+        )
         writer = self.build_coversheet(writer, allowed_sheets=allowed_resource_slugs)
         text_wrap = writer.book.add_format({"text_wrap": True})  # type: ignore
 
-        for sheet_name, df in sheets.items():
+        for sheet_name, df in get_sheets():
             short_sheet_name = sheet_name[-31:]  # only allow 31 characters
-            # if geometry is column - remove it
-            if is_geodata and "geometry" in df.columns:
-                df = df.drop(columns=["geometry"])
             df.to_excel(writer, sheet_name=short_sheet_name, index=False)
+            worksheet = writer.sheets[short_sheet_name]
 
-            for column in df:
-                column_length = max(df[column].astype(str).map(len).max(), len(column))  # type: ignore
-                column_length += 4
+            # longest value (as text) in each column, including the header
+            value_lengths = [
+                df.iloc[:, x].astype(str).str.len().max() for x in range(df.shape[1])
+            ]
+            header_lengths = [len(x) for x in df.columns]
+            widths = np.fmax(value_lengths, header_lengths) + 4
 
-                col_idx = df.columns.get_loc(column)
+            for col_idx, column_length in enumerate(widths):
                 if column_length <= 50:
-                    writer.sheets[short_sheet_name].set_column(
-                        col_idx, col_idx, column_length
-                    )
+                    worksheet.set_column(col_idx, col_idx, column_length)
                 else:  # word wrap
-                    writer.sheets[short_sheet_name].set_column(
-                        col_idx, col_idx, 50, text_wrap
-                    )
+                    worksheet.set_column(col_idx, col_idx, 50, text_wrap)
 
         writer.save()  # type: ignore
 
-    def build_sqlite(self, is_geodata: bool = False):
+    def build_sqlite(self, is_geodata: bool = False, force: bool = False):
         """
         Create a composite sqlite file for all resources
         with metadata as a seperate table.
@@ -1240,6 +1886,10 @@ class DataPackage:
             rich.print("[red]Skipping sqlite build[/red]")
             return None
 
+        sqlite_file = self.build_path() / f"{self.slug}.sqlite"
+        if not force and is_up_to_date(sqlite_file, *self.composite_inputs()):
+            return None
+
         allowed_resource_slugs = [
             x
             for x in composite_options["include"]
@@ -1249,26 +1899,27 @@ class DataPackage:
         for slug, resource in self.resources().items():
             if slug not in allowed_resource_slugs:
                 continue
-            df = resource.get_df()
-            if is_geodata and "geometry" in df.columns:
-                df = df.drop(columns=["geometry"])
-            sheets[slug] = df
+            sheets[slug] = self.get_composite_df(resource, is_geodata)
             meta_df = resource.get_metadata_df()
             meta_df["resource"] = slug
             metadata.append(meta_df)
 
         sheets["data_description"] = pd.concat(metadata)
 
-        sqlite_file = self.build_path() / f"{self.slug}.sqlite"
-
         if sqlite_file.exists():
             sqlite_file.unlink()
-        con = sqlite3.connect(sqlite_file)
-        for name, df in sheets.items():
-            df.to_sql(name, con, index=False)
-        con.close()
-
-    def build_composite_json(self, is_geodata: bool = False):
+        with closing(sqlite3.connect(sqlite_file)) as con:
+            # file is rebuilt from scratch each time, so no need to journal
+            # or wait for each write to reach disk
+            con.execute("PRAGMA journal_mode = OFF")
+            con.execute("PRAGMA synchronous = OFF")
+            con.execute("PRAGMA temp_store = MEMORY")
+            # to_sql's default sqlite path is a single executemany per frame,
+            # method="multi" is slower here and hits sqlite's variable limit
+            for name, df in sheets.items():
+                df.to_sql(name, con, index=False)
+
+    def build_composite_json(self, is_geodata: bool = False, force: bool = False):
         """
         This builds a composite json file that inlines the data as json.
         It can have less resources than the total, and some modifiers on the data.
@@ -1280,6 +1931,10 @@ class DataPackage:
             rich.print("[red]Skipping json build[/red]")
             return None
 
+        json_path = self.build_path() / f"{self.slug}.json"
+        if not force and is_up_to_date(json_path, *self.composite_inputs()):
+            return None
+
         allowed_resource_slugs = [
             x
             for x in composite_options["include"]
@@ -1287,19 +1942,17 @@ class DataPackage:
         ]
 
         datapackage["resources"] = [
-            x.get_resource(inline_data=True, is_geodata=is_geodata)
+            x.get_resource(
+                inline_data=True,
+                is_geodata=is_geodata,
+                df=self.get_composite_df(x, is_geodata),
+            )
             for x in self.resources().values()
             if x.slug in allowed_resource_slugs
         ]
 
         del datapackage["custom"]
 
-        def modify_item_in_row(row: dict, column: str, operation: Callable[[Any], Any]):
-            """Modify a row in a json array"""
-            if column in row:
-                row[column] = operation(row[column])
-            return row
-
         t = TypeVar("t", str, float)
 
         def convert_to_array_from_comma(value: t) -> list[t]:
@@ -1330,12 +1983,12 @@ class DataPackage:
                                 schema_field["description"] = schema_field[
                                     "description"
                                 ].replace("comma seperated", "array")
-                            resource["data"] = [
-                                modify_item_in_row(
-                                    x, column, convert_to_array_from_comma
-                                )
-                                for x in resource["data"]
-                            ]
+                            # rows are our own copies, so update in place
+                            for row in resource["data"]:
+                                if column in row:
+                                    row[column] = convert_to_array_from_comma(
+                                        row[column]
+                                    )
                 else:
                     raise ValueError(f"Unrecognised modify type {modify_type}")
 
@@ -1343,17 +1996,46 @@ class DataPackage:
             if isinstance(o, np.ndarray):
                 return list(o)
 
-        with open(self.build_path() / f"{self.slug}.json", "w") as f:
-            json.dump(datapackage, f, indent=4, default=custom_converter)
+        dump_json(datapackage, json_path, default=custom_converter)
 
-    def build_composites(self):
+    def get_composite_df(
+        self, resource: DataResource, is_geodata: bool = False
+    ) -> pd.DataFrame:
+        """
+        Dataframe of a resource for the composite files (without geometry).
+        While build_composites runs, each resource is only read once and
+        the same dataframe is given to every builder - so don't modify it.
+        """
+        exclude = ["geometry"] if is_geodata else None
+        if self._composite_dfs is None:
+            return resource.get_df(exclude=exclude)
+        future = Future()
+        # setdefault is atomic, so only the first builder to ask reads the file
+        shared = self._composite_dfs.setdefault(resource.slug, future)
+        if shared is future:
+            try:
+                future.set_result(resource.get_df(exclude=exclude))
+            except Exception as e:
+                future.set_exception(e)
+        return shared.result()
+
+    def build_composites(self, force: bool = False):
         """
         Create composite files for the datapackage
         """
         is_geodata = self.is_geodata()
-        self.build_excel(is_geodata)
-        self.build_sqlite(is_geodata)
-        self.build_composite_json(is_geodata)
+        builders = [self.build_excel, self.build_sqlite, self.build_composite_json]
+        self._composite_dfs = {}
+        try:
+            # each writes its own file, so they can run alongside each other
+            with ThreadPoolExecutor(max_workers=len(builders)) as executor:
+                futures = [
+                    executor.submit(build, is_geodata, force) for build in builders
+                ]
+                for future in futures:
+                    future.result()
+        finally:
+            self._composite_dfs = None
 
     def build_markdown(self):
         """
@@ -1362,12 +2044,12 @@ class DataPackage:
         ...
 
     def print_status(self):
-        resources = list(self.resources().values())
+        statuses = self.resource_statuses()
 
         df = pd.DataFrame(
             {
-                "Resource": [x.slug for x in resources],
-                "Status": [make_color(*x.get_status()) for x in resources],
+                "Resource": list(statuses),
+                "Status": [make_color(*x) for x in statuses.values()],
             }
         )
 
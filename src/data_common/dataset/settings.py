@@ -19,16 +19,15 @@ def get_settings(toml_file: str = "pyproject.toml") -> SettingsDict:
     Get basic data settings
     """
 
-    top_level: list[str] = []
-    attempt = 0
-    while Path(*top_level, toml_file).exists() is False and attempt < 10:
-        top_level.append("..")
-        attempt += 1
-    if Path(*top_level, toml_file).exists() is False:
+    # look in the current folder and up to 10 parents, checking each once
+    for depth in range(11):
+        top_level = [".."] * depth
+        settings_file = Path(*top_level, toml_file)
+        if settings_file.exists():
+            break
+    else:
         raise ValueError("Can't find top level pyproject.toml")
 
-    settings_file = Path(*top_level, toml_file)
-
     data = toml.load(settings_file)["tool"]["dataset"]
 
     data["publish_dir"] = Path(*top_level, data["publish_dir"])
@@ -22,7 +22,10 @@ def expand_array(series: pd.Series) -> pd.Series:
     This function takes in a series and returns a new series where any arrays have been expanded into separate rows.
     """
     # if any values are an np.ndarray - we need to convert them to a string to avoid a TypeError
-    if any(isinstance(x, (list, tuple, np.ndarray)) for x in series):
+    # (only object columns can hold them, so skip the scan for anything else)
+    if series.dtype == object and any(
+        isinstance(x, (list, tuple, np.ndarray)) for x in series
+    ):
         return series.apply(str)  # type: ignore
     return series
 
@@ -32,12 +35,14 @@ def is_unique(series: pd.Series) -> bool:
     This function takes in a series and returns a boolean of whether or not all the values in the series are unique.
     """
 
-    return len(series) == len(expand_array(series).unique())
+    return bool(expand_array(series).is_unique)
 
 
 def get_example(series: pd.Series) -> str | int | float:
     try:
-        item = sorted(list(series.dropna()))
+        # only the smallest value is used, so min rather than sorting them all
+        values = series.dropna()
+        item = [min(values)] if len(values) else []
     except ValueError:
         item = series
     if len(item) == 0:
@@ -134,23 +139,26 @@ def update_table_schema(
     else:
         raise ValueError(f"Unsupported file type {path.suffix}")
 
-    # get columns that have less than 15 unique entries and have no blank entries
-
-    def safe_unique(col: pd.Series) -> bool:
-        # check nunique is under 15
+    # columns that have less than 15 unique entries and have no blank entries
+    # are enums - the unique values are worked out once here and passed on
+    enums: dict[str, EnumPlaceholder | list[Any]] = {}
+    for name, col in df.items():
+        if col.isnull().any():
+            continue
         # if the series contains any items that is itsef an numpy array - we need to
-        # convert it to a string to avoid a TypeError
-        if any(isinstance(x, (list, tuple, np.ndarray)) for x in col):
-            return False
-        return col.nunique() < 15 and not col.isnull().any()
-
-    cols = df.apply(safe_unique)
-    low_count_cols = df.columns.to_series()[cols].to_list()
+        # skip it to avoid a TypeError
+        if col.dtype == object and any(
+            isinstance(x, (list, tuple, np.ndarray)) for x in col
+        ):
+            continue
+        unique_values = col.unique()
+        if len(unique_values) < 15:
+            enums[name] = unique_values.tolist()
 
     return Schema.get_table_schema(
         df,
         descriptions=(
             get_descriptions_from_schema(existing_schema) if existing_schema else {}
         ),
-        enums={x: Schema.USE_UNIQUE for x in low_count_cols},
+        enums=enums,
     )
@@ -1,4 +1,9 @@
 import re
+from functools import lru_cache
+
+_SEMVER_RE = re.compile(
+    r"^(?P<major>0|[1-9]\d*)\.(?P<minor>0|[1-9]\d*)\.(?P<patch>0|[1-9]\d*)(?:-(?P<prerelease>[0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*))?(?:\+(?P<build>[0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*))?$"
+)
 
 
 def map_versions_to_latest_major_minor(
@@ -11,16 +16,19 @@ def map_versions_to_latest_major_minor(
     """
     version_map = {}
 
-    split_versions = [
-        x.split(".") for x in versions if "-" not in x
-    ]  # exclude prerelease versions from latest versions
-    split_versions = [(int(x), int(y), int(z)) for x, y, z in split_versions]
+    # (major, minor, patch) as ints to sort by, alongside the original string
+    split_versions: list[tuple[tuple[int, int, int], str]] = []
+    for version in versions:
+        if "-" in version:  # exclude prerelease versions from latest versions
+            continue
+        major, minor, patch = version.split(".")
+        split_versions.append(((int(major), int(minor), int(patch)), version))
     split_versions.sort()
 
-    for major, minor, patch in split_versions:
-        version_map[f"{major}.{minor}"] = f"{major}.{minor}.{patch}"
-        version_map[f"{major}"] = f"{major}.{minor}.{patch}"
-    version_map["latest"] = ".".join([str(x) for x in split_versions[-1]])
+    for (major, minor, _), version in split_versions:
+        version_map[f"{major}.{minor}"] = version
+        version_map[f"{major}"] = version
+    version_map["latest"] = split_versions[-1][1]
     return version_map
 
 
@@ -36,40 +44,33 @@ def parse_semver(version_string: str) -> None | dict[str, str]:
     Parse a string and return a dictionary of its semver components.
     If the string is not a valid semver, return None.
     """
-    semver_regex = re.compile(
-        r"^(?P<major>0|[1-9]\d*)\.(?P<minor>0|[1-9]\d*)\.(?P<patch>0|[1-9]\d*)(?:-(?P<prerelease>[0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*))?(?:\+(?P<build>[0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*))?$"
-    )
-    match = semver_regex.match(version_string)
+    match = _SEMVER_RE.match(version_string)
     if match is None:
         return None
     return match.groupdict()
 
 
+@lru_cache(maxsize=1024)
+def _parse_core(version_string: str) -> tuple[int, int, int] | None:
+    """
+    (major, minor, patch) of a valid semver, or None if it isn't valid.
+    Cached, as the same versions are compared repeatedly when sorting.
+    """
+    match = _SEMVER_RE.match(version_string)
+    if match is None:
+        return None
+    return int(match["major"]), int(match["minor"]), int(match["patch"])
+
+
 def semver_is_higher(semver1: str, semver2: str) -> bool:
     """Returns True if semver2 is a higher version than semver1, False otherwise."""
-    # parse semvers into dictionaries
-    semver1_dict = parse_semver(semver1)
-    semver2_dict = parse_semver(semver2)
     # if either semver is not valid, return False
-    if semver1_dict is None or semver2_dict is None:
+    # otherwise compare (major, minor, patch) in order
+    parts1 = _parse_core(semver1)
+    parts2 = _parse_core(semver2)
+    if parts1 is None or parts2 is None:
         return False
-    # compare major versions
-    if int(semver2_dict["major"]) > int(semver1_dict["major"]):
-        return True
-    # compare minor versions
-    if int(semver2_dict["major"]) == int(semver1_dict["major"]) and int(
-        semver2_dict["minor"]
-    ) > int(semver1_dict["minor"]):
-        return True
-    # compare patch versions
-    if (
-        int(semver2_dict["major"]) == int(semver1_dict["major"])
-        and int(semver2_dict["minor"]) == int(semver1_dict["minor"])
-        and int(semver2_dict["patch"]) > int(semver1_dict["patch"])
-    ):
-        return True
-    # otherwise, semver2 is not a higher version
-    return False
+    return parts2 > parts1
 
 
 def bump_version(semver: str, choice: str):
@@ -79,26 +80,18 @@ def bump_version(semver: str, choice: str):
     minor versions.
     """
     # Parse the semver into parts
-    parts = parse_semver(semver)
+    parts = _parse_core(semver)
 
     if parts is None:
         raise ValueError(f"Invalid semvar {semver}")
 
-    # Check if the given choice is a valid one
-    if choice not in ["major", "minor", "patch"]:
-        raise ValueError(f"Invalid choice: {choice}")
-
-    # Bump the requested part
-    parts[choice] = str(int(parts[choice]) + 1)
+    major, minor, patch = parts
 
-    # If we've bumped the major version, reset the minor and patch
+    # Bump the requested part, lowering the more minor versions
     if choice == "major":
-        parts["minor"] = "0"
-        parts["patch"] = "0"
-
-    # If we've bumped the minor version, reset the patch
+        return f"{major + 1}.0.0"
     if choice == "minor":
-        parts["patch"] = "0"
-
-    # Join all the parts together and return
-    return ".".join([parts["major"], parts["minor"], parts["patch"]])
+        return f"{major}.{minor + 1}.0"
+    if choice == "patch":
+        return f"{major}.{minor}.{patch + 1}"
+    raise ValueError(f"Invalid choice: {choice}")
@@ -25,20 +25,40 @@ def get_settings(toml_file: str = "pyproject.toml") -> dict:
     Get basic data settings
     """
 
-    top_level: list[str] = []
-    attempt = 0
-    while Path(*top_level, toml_file).exists() is False and attempt < 10:
-        top_level.append("..")
-        attempt += 1
-    if Path(*top_level, toml_file).exists() is False:
+    # look in the current folder and up to 10 parents, checking each once
+    for depth in range(11):
+        settings_file = Path(*[".."] * depth, toml_file)
+        if settings_file.exists():
+            break
+    else:
         raise ValueError("Can't find top level pyproject.toml")
 
-    settings_file = Path(*top_level, toml_file)
-
     data = toml.load(settings_file)["tool"]["duck"]
     return data
 
 
+_JINJA_ENV = jinja2.Environment()
+
+
+@lru_cache(maxsize=256)
+def get_template(query: str) -> jinja2.Template:
+    """
+    Compiled jinja template for a query.
+    from_string doesn't use the environment's template cache, so
+    the same query text is only compiled once here.
+    """
+    return _JINJA_ENV.from_string(query)
+
+
+@lru_cache(maxsize=256)
+def read_query_file(path: str, mtime_ns: int, size: int) -> str:
+    """
+    Contents of a sql file - the modification time and size are part
+    of the key so an edited file is read again
+    """
+    return Path(path).read_text()
+
+
 class DuckResponse:
     def __init__(self, duck: "DuckQuery", query: str):
         self._duck = duck
@@ -244,7 +264,8 @@ class DuckQuery:
                 path = Path(query_path, query)
                 if not path.exists():
                     raise ValueError(f"Could not find query file {query}")
-            query = path.read_text()
+            stat = path.stat()
+            query = read_query_file(str(path), stat.st_mtime_ns, stat.st_size)
 
         def wrap_str(s: str) -> str:
             return f"'{s}'"
@@ -263,8 +284,7 @@ class DuckQuery:
             return value
 
         if query_vars:
-            env = jinja2.Environment()
-            template = env.from_string(query)
+            template = get_template(query)
 
             args = {k: process_kwarg(k, v) for k, v in query_vars.items()}
 
@@ -0,0 +1,77 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from data_common.dataset import resource_management
+from data_common.dataset.resource_management import DataPackage
+
+
+@pytest.fixture
+def package(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> DataPackage:
+    """
+    A one resource package, published under tmp_path
+    """
+    monkeypatch.setattr(
+        resource_management,
+        "get_settings",
+        lambda: {"publish_dir": tmp_path / "publish"},
+    )
+    # keep the resource hashes out of the real user cache
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    package_dir = tmp_path / "data" / "packages" / "example"
+    package_dir.mkdir(parents=True)
+    (package_dir / "datapackage.yaml").write_text(
+        "name: example\nversion: 0.1.0\ncustom:\n  formats:\n    parquet: false\n"
+    )
+    (package_dir / "people.csv").write_text("name,age\nalice,30\nbob,40\n")
+    return DataPackage(package_dir)
+
+
+def backdate(path: Path):
+    """
+    Move a file's mtime an hour into the past, so a rewrite is visible
+    """
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - 3600 * 10**9))
+
+
+def test_unchanged_resources_not_copied_again(package: DataPackage):
+    package.copy_resources()
+    built = package.build_path() / "people.csv"
+    assert built.read_text() == "name,age\nalice,30\nbob,40\n"
+
+    # still newer than the source, so left alone
+    built.write_text("edited")
+    package.copy_resources()
+    assert built.read_text() == "edited"
+
+    # unless forced
+    package.copy_resources(force=True)
+    assert built.read_text() == "name,age\nalice,30\nbob,40\n"
+
+
+def test_changed_resources_copied_again(package: DataPackage):
+    package.copy_resources()
+    built = package.build_path() / "people.csv"
+    backdate(built)
+
+    (package.path / "people.csv").write_text("name,age\ncarol,50\n")
+    package.copy_resources()
+    assert built.read_text() == "name,age\ncarol,50\n"
+
+
+def test_composite_skipped_while_up_to_date(package: DataPackage):
+    json_path = package.build_path() / "example.json"
+    json_path.write_text("{}")
+    package.build_composite_json()
+    assert json_path.read_text() == "{}"
+
+    package.build_composite_json(force=True)
+    assert json_path.read_text() != "{}"
+
+    # older than the datapackage.yaml, so rebuilt
+    json_path.write_text("{}")
+    backdate(json_path)
+    package.build_composite_json()
+    assert json_path.read_text() != "{}"
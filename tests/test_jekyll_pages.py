@@ -0,0 +1,46 @@
+from pathlib import Path
+
+from data_common.dataset.jekyll_management import _render_pages
+
+
+def render(output_dirs: list[Path], names: list[str]):
+    """
+    Render a page for each name - <package>/<version>.md names into the
+    first output dir, version list <package>.md names into the second
+    """
+    pages = []
+    for name in names:
+        dest = output_dirs[0] / name if "/" in name else output_dirs[1] / name
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        pages.append((str(dest), {"title": name}))
+    _render_pages(pages, output_dirs)
+
+
+def test_pruning_removes_only_stale_pages(tmp_path: Path):
+    datasets_dir = tmp_path / "_datasets"
+    versionlists_dir = tmp_path / "_versionlists"
+    output_dirs = [datasets_dir, versionlists_dir]
+    for output_dir in output_dirs:
+        output_dir.mkdir()
+
+    # added by hand, not by the renderer
+    (versionlists_dir / "index.md").write_text("hand written")
+    (datasets_dir / "README.md").write_text("hand written")
+    (datasets_dir / "notes").mkdir()
+    (datasets_dir / "notes" / "1.0.0.md").write_text("hand written")
+
+    render(output_dirs, ["a/1.0.0.md", "a/1.1.0.md", "b/1.0.0.md", "a.md", "b.md"])
+    assert (datasets_dir / "b" / "1.0.0.md").read_text().startswith("---\n")
+
+    # b is no longer published, and a has lost a version
+    render(output_dirs, ["a/1.1.0.md", "a.md"])
+
+    assert (datasets_dir / "a" / "1.1.0.md").exists()
+    assert (versionlists_dir / "a.md").exists()
+    assert not (datasets_dir / "a" / "1.0.0.md").exists()
+    assert not (datasets_dir / "b").exists()
+    assert not (versionlists_dir / "b.md").exists()
+
+    assert (versionlists_dir / "index.md").read_text() == "hand written"
+    assert (datasets_dir / "README.md").read_text() == "hand written"
+    assert (datasets_dir / "notes" / "1.0.0.md").read_text() == "hand written"
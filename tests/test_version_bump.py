@@ -0,0 +1,107 @@
+import hashlib
+from pathlib import Path
+
+import pytest
+from ruamel.yaml import YAML
+
+from data_common.dataset import resource_management
+from data_common.dataset.resource_management import DataPackage
+
+ROWS = "name,age\nalice,30\nbob,40\n"
+
+
+@pytest.fixture(autouse=True)
+def settings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(
+        resource_management,
+        "get_settings",
+        lambda: {
+            "publish_dir": tmp_path / "publish",
+            "publish_url": "https://example.org/",
+        },
+    )
+
+
+def write_package(path: Path, data: str, data_hash: str, row_count: int):
+    """
+    A package with a single csv resource, whose resource yaml records
+    data_hash and row_count
+    """
+    path.mkdir(parents=True, exist_ok=True)
+    (path / "datapackage.yaml").write_text("name: example\nversion: 0.1.0\n")
+    (path / "people.csv").write_text(data)
+    resource = {
+        "title": "People",
+        "name": "people",
+        "path": "people.csv",
+        "scheme": "file",
+        "format": "csv",
+        "hash": data_hash,
+        "custom": {"row_count": row_count},
+        "schema": {
+            "fields": [
+                {"name": "name", "type": "string"},
+                {"name": "age", "type": "integer"},
+            ]
+        },
+    }
+    with open(path / "people.resource.yaml", "w") as f:
+        YAML().dump(resource, f)
+
+
+def md5(data: str) -> str:
+    return hashlib.md5(data.encode()).hexdigest()
+
+
+def sha256(data: str) -> str:
+    return "sha256:" + hashlib.sha256(data.encode()).hexdigest()
+
+
+def make_packages(tmp_path: Path, current_data: str, rows: int):
+    """
+    The current package, with version 0.1.0 (ROWS) stored under versions
+    with a legacy md5 hash
+    """
+    package_dir = tmp_path / "example"
+    write_package(package_dir / "versions" / "0.1.0", ROWS, md5(ROWS), 2)
+    write_package(package_dir, current_data, sha256(current_data), rows)
+    return DataPackage(package_dir)
+
+
+def test_legacy_md5_hash_is_not_a_change(tmp_path: Path):
+    package = make_packages(tmp_path, ROWS, 2)
+    assert package.derive_bump_rule_from_change() is None
+
+
+def test_changed_data_is_a_patch(tmp_path: Path):
+    changed = "name,age\nalice,31\nbob,40\n"
+    package = make_packages(tmp_path, changed, 2)
+    assert package.derive_bump_rule_from_change() == (
+        "PATCH",
+        "Minor change in data for resource(s): people",
+    )
+
+
+def test_added_rows_are_minor(tmp_path: Path):
+    changed = ROWS + "carol,50\n"
+    package = make_packages(tmp_path, changed, 3)
+    assert package.derive_bump_rule_from_change() == (
+        "MINOR",
+        "Change in data for resource(s): people",
+    )
+
+
+def test_align_hash_algorithms_keeps_matching_md5(tmp_path: Path):
+    package = make_packages(tmp_path, ROWS, 2)
+    previous = {"resources": [{"name": "people", "hash": md5(ROWS)}]}
+    current = {
+        "resources": [{"name": "people", "path": "people.csv", "hash": sha256(ROWS)}]
+    }
+    package.align_hash_algorithms(previous, current)
+    assert current["resources"][0]["hash"] == md5(ROWS)
+
+    # a different file keeps its new hash
+    (package.path / "people.csv").write_text("name,age\n")
+    current["resources"][0]["hash"] = sha256("name,age\n")
+    package.align_hash_algorithms(previous, current)
+    assert current["resources"][0]["hash"] == sha256("name,age\n")
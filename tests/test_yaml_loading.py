@@ -0,0 +1,55 @@
+import io
+from pathlib import Path
+
+from ruamel.yaml import YAML
+
+from data_common.dataset.resource_management import load_yaml, quote_ambiguous_values
+
+
+def round_trip(data: dict, path: Path) -> dict:
+    """
+    Write as rebuild_yaml does and read back with load_yaml
+    """
+    yaml = YAML()
+    yaml.default_flow_style = False
+    with io.StringIO() as f:
+        yaml.dump(data, f, transform=quote_ambiguous_values)
+        path.write_text(f.getvalue())
+    return load_yaml(path)
+
+
+def test_yaml_round_trip(tmp_path: Path):
+    data = {
+        "example": "10:30",
+        "long_time": "10:30:00",
+        "code": "0755",
+        "answer": "No",
+        "flag": True,
+        "count": 755,
+        "ratio": 1.5,
+        "enum": ["10:30", "10:30:00", "0755", "yes", "no", "Yes", "No"],
+    }
+    path = tmp_path / "test.resource.yaml"
+    assert round_trip(data, path) == data
+
+
+def test_yaml_12_scalars(tmp_path: Path):
+    path = tmp_path / "test.yaml"
+    path.write_text(
+        "time: 10:30\n"
+        "long_time: 10:30:00\n"
+        "leading_zero: 0755\n"
+        "octal: 0o755\n"
+        "word: yes\n"
+        "flag: false\n"
+        "exponent: 1e3\n"
+    )
+    assert load_yaml(path) == {
+        "time": "10:30",
+        "long_time": "10:30:00",
+        "leading_zero": 755,
+        "octal": 493,
+        "word": "yes",
+        "flag": False,
+        "exponent": 1000.0,
+    }